@@ -1,21 +1,77 @@
 import streamlit as st
-import sys
-import os
+import functools
 from pathlib import Path
+from bson import json_util
 
-# Add current directory to Python path to find modules
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-# Import the modules directly
+# Import the modules directly (streamlit run puts the script's directory on sys.path)
 import byte_extractor_service
 import logger_config
 
+logger = logger_config.logger
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_page(query_json: str, page_number: int, page_size: int,
+                projection: dict = None, after_id: str = None):
+    """
+    Cached wrapper around fetch_paginated_bytes_with_query.
+    
+    Errors propagate instead of being turned into an empty page, so a failed
+    fetch is never cached.
+    
+    Args:
+        query_json (str): Query serialized with
+            json_util.dumps(query, json_options=json_util.CANONICAL_JSON_OPTIONS),
+            which round-trips ObjectId and datetime values unchanged
+        page_number (int): Page number to fetch
+        page_size (int): Number of documents per page
+        projection (dict, optional): Fields to return; full documents if None
+        after_id (str, optional): _id of the last document on the previous page
+        
+    Returns:
+        dict: Pagination result with page_number, total_pages, and docs
+    """
+    return byte_extractor_service.fetch_paginated_bytes_with_query(
+        json_util.loads(query_json), page_number, page_size, projection, after_id
+    )
+
+
+def _clears_page_cache(update_func):
+    """
+    Wrap a review status writer so cached pages are dropped after it succeeds.
+    
+    Args:
+        update_func (callable): Service function returning a truthy value on success
+        
+    Returns:
+        callable: Wrapped function with the same signature and return value
+    """
+    @functools.wraps(update_func)
+    def wrapper(*args, **kwargs):
+        result = update_func(*args, **kwargs)
+        if result:
+            cached_page.clear()
+        return result
+    return wrapper
+
+
 # Get the required functions and variables
 collection = byte_extractor_service.collection
 get_paginated_bytes_with_query = byte_extractor_service.get_paginated_bytes_with_query
-update_summary_review_status = byte_extractor_service.update_summary_review_status
-update_original_article_review_status = byte_extractor_service.update_original_article_review_status
-logger = logger_config.logger
+update_summary_review_status = _clears_page_cache(byte_extractor_service.update_summary_review_status)
+update_original_article_review_status = _clears_page_cache(byte_extractor_service.update_original_article_review_status)
+
+
+@st.cache_resource
+def load_viewer_html() -> str:
+    """
+    Read the comparison viewer HTML once per process.
+    
+    Returns:
+        str: Contents of article_comparison_viewer.html
+    """
+    html_file_path = Path(__file__).parent / "article_comparison_viewer.html"
+    return html_file_path.read_text(encoding='utf-8')
 
 # -------------------------
 # Streamlit Page Config
@@ -69,11 +125,6 @@ elif page == "📊 Article Comparison Viewer":
     st.title("📊 Article Comparison Viewer")
     st.markdown("Compare original articles with their summaries side by side.")
     
-    # Read and embed the HTML file
-    html_file_path = Path(__file__).parent / "article_comparison_viewer.html"
-    with open(html_file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
     # Embed the HTML component with full height
-    st.components.v1.html(html_content, height=800, scrolling=True)
+    st.components.v1.html(load_viewer_html(), height=800, scrolling=True)
 
@@ -1,7 +1,11 @@
 import os
 import sys
-from typing import List, Dict
-from pymongo import MongoClient
+import time
+import threading
+from typing import List, Dict, Optional, Tuple
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from bson import ObjectId, json_util
 from logger_config import logger
 
 # Add current directory to path for config import
@@ -36,7 +40,15 @@ logger.info(f"MongoDB URL loaded: {MONGODB_URL[:20]}...")
 # -------------------------
 logger.info("Initializing MongoDB connection")
 try:
-    client_mongo = MongoClient(MONGODB_URL)
+    # One pooled client per process; zlib needs no extra packages and shrinks
+    # the text-heavy article payloads on the wire
+    client_mongo = MongoClient(
+        MONGODB_URL,
+        maxPoolSize=50,
+        compressors="zlib",
+        retryWrites=True,
+        appname="hfn-viewer"
+    )
     db = client_mongo[DB_NAME]
     collection = db[COLLECTION_NAME]
     logger.info("MongoDB connection established successfully")
@@ -44,47 +56,163 @@ except Exception as e:
     logger.error(f"Failed to connect to MongoDB: {e}")
     raise
 
+# Indexes matching the app's query shapes; pages are sorted by _id
+INDEXES = [
+    [("summary_review_status", 1), ("_id", 1)],
+    [("orgnl_artcl_rv_sts", 1), ("_id", 1)],
+]
 
-def get_paginated_bytes_with_query(query: dict, page_number: int, page_size: int = 10):
+# -------------------------
+# Count Cache
+# -------------------------
+# Total counts per query as {query_key: (total_docs, cached_at)}, so paging
+# through the same filter does not re-run count_documents on every page.
+# Streamlit serves sessions from several threads, hence the lock. The
+# generation is bumped on every clear so a count that was in flight during a
+# write is not stored afterwards.
+COUNT_CACHE_TTL_SECONDS = 60
+_count_cache: Dict[str, Tuple[int, float]] = {}
+_count_cache_lock = threading.Lock()
+_count_cache_generation = 0
+
+
+def _query_key(query: dict) -> str:
     """
-    Fetch paginated articles from MongoDB using a custom query.
+    Serialize a query into a stable cache key.
+    
+    Canonical Extended JSON keeps BSON types distinct, so {"_id": ObjectId(x)}
+    and {"_id": "x"} get different keys. Keys are not sorted because embedded
+    document matches depend on field order.
+    
+    Args:
+        query (dict): MongoDB query dictionary
+        
+    Returns:
+        str: Key that is equal for equal queries
+    """
+    return json_util.dumps(query, json_options=json_util.CANONICAL_JSON_OPTIONS)
+
+
+def _clear_count_cache():
+    """Drop all cached counts, e.g. after a write that changes filter results."""
+    global _count_cache_generation
+    with _count_cache_lock:
+        _count_cache.clear()
+        _count_cache_generation += 1
+
+
+def _count_documents_cached(query: dict) -> int:
+    """
+    Count documents matching a query, reusing a recent count when available.
+    
+    Args:
+        query (dict): MongoDB query dictionary
+        
+    Returns:
+        int: Number of matching documents
+    """
+    query_key = _query_key(query)
+    now = time.monotonic()
+    
+    with _count_cache_lock:
+        # Evict expired entries so the cache only holds recently used queries
+        expired = [k for k, (_, cached_at) in _count_cache.items() if now - cached_at >= COUNT_CACHE_TTL_SECONDS]
+        for k in expired:
+            del _count_cache[k]
+        
+        cached = _count_cache.get(query_key)
+        generation = _count_cache_generation
+    
+    if cached:
+        logger.debug("Using cached document count: %d", cached[0])
+        return cached[0]
+    
+    total_docs = collection.count_documents(query)
+    with _count_cache_lock:
+        # Skip the store if a write cleared the cache while we were counting
+        if generation == _count_cache_generation:
+            _count_cache[query_key] = (total_docs, now)
+    return total_docs
+
+
+def fetch_paginated_bytes_with_query(query: dict, page_number: int, page_size: int = 10,
+                                     projection: Optional[dict] = None, after_id: Optional[str] = None):
+    """
+    Fetch paginated articles from MongoDB using a custom query, raising on errors.
+    
+    Documents are ordered by _id. When after_id is given (the _id of the last
+    document on the previous page), the page is fetched with a range query on
+    _id instead of skipping, which keeps deep pages cheap.
     
     Args:
         query (dict): MongoDB query dictionary
         page_number (int): Page number to fetch
         page_size (int): Number of documents per page
+        projection (dict, optional): Fields to return; full documents if None
+        after_id (str, optional): _id of the last document on the previous page
         
     Returns:
         dict: Pagination result with page_number, total_pages, and docs
     """
-    logger.info(f"Fetching paginated articles - Page: {page_number}, Size: {page_size}")
-    logger.debug(f"Query: {query}")
+    logger.info("Fetching paginated articles - Page: %s, Size: %s", page_number, page_size)
+    logger.debug("Query: %s", query)
     
-    try:
+    if after_id and not ObjectId.is_valid(after_id):
+        logger.warning("Invalid after_id '%s', falling back to skip/limit pagination", after_id)
+        after_id = None
+    
+    # Get total count for pagination
+    logger.info("Counting total documents matching query")
+    total_docs = _count_documents_cached(query)
+    total_pages = (total_docs + page_size - 1) // page_size  # Ceiling division
+    logger.info("Total documents: %d, Total pages: %d", total_docs, total_pages)
+    
+    # Fetch documents with pagination
+    if after_id:
+        logger.info("Fetching documents after _id=%s, limit=%s", after_id, page_size)
+        range_query = {"$and": [query, {"_id": {"$gt": ObjectId(after_id)}}]}
+        cursor = collection.find(range_query, projection).sort("_id", 1)
+    else:
         # Calculate skip value
         skip = (page_number - 1) * page_size
-        logger.debug(f"Calculated skip value: {skip}")
-        
-        # Get total count for pagination
-        logger.info("Counting total documents matching query")
-        total_docs = collection.count_documents(query)
-        total_pages = (total_docs + page_size - 1) // page_size  # Ceiling division
-        logger.info(f"Total documents: {total_docs}, Total pages: {total_pages}")
-        
-        # Fetch documents with pagination
-        logger.info(f"Fetching documents with skip={skip}, limit={page_size}")
-        docs = list(collection.find(query).skip(skip).limit(page_size))
-        logger.info(f"Retrieved {len(docs)} documents")
-        
-        result = {
-            "page_number": page_number,
-            "total_pages": total_pages,
-            "total_docs": total_docs,
-            "docs": docs
-        }
+        logger.debug("Calculated skip value: %d", skip)
         
-        logger.info(f"Successfully returned pagination result: {len(docs)} docs on page {page_number} of {total_pages}")
-        return result
+        logger.info("Fetching documents with skip=%d, limit=%s", skip, page_size)
+        cursor = collection.find(query, projection).sort("_id", 1).skip(skip)
+    docs = list(cursor.limit(page_size))
+    logger.info("Retrieved %d documents", len(docs))
+    
+    result = {
+        "page_number": page_number,
+        "total_pages": total_pages,
+        "total_docs": total_docs,
+        "docs": docs
+    }
+    
+    logger.info("Successfully returned pagination result: %d docs on page %s of %d", len(docs), page_number, total_pages)
+    return result
+
+
+def get_paginated_bytes_with_query(query: dict, page_number: int, page_size: int = 10,
+                                   projection: Optional[dict] = None, after_id: Optional[str] = None):
+    """
+    Fetch paginated articles from MongoDB using a custom query.
+    
+    Same as fetch_paginated_bytes_with_query, but returns an empty page
+    instead of raising when the query fails.
+    
+    Args:
+        query (dict): MongoDB query dictionary
+        page_number (int): Page number to fetch
+        page_size (int): Number of documents per page
+        projection (dict, optional): Fields to return; full documents if None
+        after_id (str, optional): _id of the last document on the previous page
+        
+    Returns:
+        dict: Pagination result with page_number, total_pages, and docs
+    """
+    try:
+        return fetch_paginated_bytes_with_query(query, page_number, page_size, projection, after_id)
         
     except Exception as e:
         logger.error(f"Error in get_paginated_bytes_with_query: {e}", exc_info=True)
@@ -96,48 +224,72 @@ def get_paginated_bytes_with_query(query: dict, page_number: int, page_size: int
         }
 
 
-def update_summary_review_status(article_id: str, status: str) -> bool:
+def _update_review_fields(article_id: str, fields: Dict[str, str], label: str) -> bool:
     """
-    Update article's summary review status.
+    Set one or more review status fields on an article.
+    
+    Values are stored literally with $set, and $currentDate stamps reviewed_at
+    with the server's clock; reviewed_at is the time of the article's most
+    recent review action, whichever status it changed.
     
     Args:
         article_id (str): MongoDB document _id
-        status (str): "accepted" or "rejected"
+        fields (Dict[str, str]): Status fields to set and their values
+        label (str): Human-readable name of the status used in log messages
         
     Returns:
         bool: True if update successful, False otherwise
     """
-    logger.info(f"Updating summary review status for article {article_id} to '{status}'")
+    logger.info(f"Updating {label} for article {article_id} to {fields}")
     
     try:
-        from bson import ObjectId
+        # Reject malformed IDs before spending a round-trip on them
+        if not ObjectId.is_valid(article_id):
+            logger.warning(f"Invalid article_id '{article_id}', skipping update")
+            return False
         
-        # Convert string ID to ObjectId
-        logger.debug(f"Converting article_id '{article_id}' to ObjectId")
+        logger.debug("Converting article_id '%s' to ObjectId", article_id)
         object_id = ObjectId(article_id)
         
-        # Update the document
-        logger.info(f"Executing MongoDB update operation")
-        result = collection.update_one(
+        # Update the document and get back only its _id in the same round-trip
+        logger.info(f"Executing MongoDB find_one_and_update operation for {label}")
+        doc = collection.find_one_and_update(
             {"_id": object_id},
-            {"$set": {"summary_review_status": status}}
+            {"$set": fields, "$currentDate": {"reviewed_at": True}},
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER
         )
         
-        success = result.modified_count > 0
-        logger.info(f"Update result - Modified count: {result.modified_count}, Success: {success}")
+        success = doc is not None
+        logger.info(f"Update result - Matched: {success}")
         
         if success:
-            logger.info(f"Successfully updated article {article_id} status to '{status}'")
+            _clear_count_cache()
+            logger.info(f"Successfully updated article {article_id} {label} to {fields}")
         else:
-            logger.warning(f"No documents were modified for article {article_id}")
+            logger.warning(f"No document found for article {article_id}")
         
         return success
         
     except Exception as e:
-        logger.error(f"Error updating summary review status for article {article_id}: {e}", exc_info=True)
+        logger.error(f"Error updating {label} for article {article_id}: {e}", exc_info=True)
         return False
 
 
+def update_summary_review_status(article_id: str, status: str) -> bool:
+    """
+    Update article's summary review status.
+    
+    Args:
+        article_id (str): MongoDB document _id
+        status (str): "accepted" or "rejected"
+        
+    Returns:
+        bool: True if update successful, False otherwise
+    """
+    return _update_review_fields(article_id, {"summary_review_status": status}, "summary review status")
+
+
 def update_original_article_review_status(article_id: str, status: str) -> bool:
     """
     Update the original article review status in MongoDB.
@@ -149,32 +301,122 @@ def update_original_article_review_status(article_id: str, status: str) -> bool:
     Returns:
         bool: True if update successful, False otherwise
     """
-    logger.info(f"Updating original article review status for article {article_id} to '{status}'")
+    return _update_review_fields(article_id, {"orgnl_artcl_rv_sts": status}, "original article review status")
+
+
+def update_both_review_status(article_id: str, status: str) -> bool:
+    """
+    Set the summary and original article review statuses in one update.
     
-    try:
-        from bson import ObjectId
+    Args:
+        article_id (str): MongoDB document _id
+        status (str): "accepted" or "rejected"
         
-        # Convert string ID to ObjectId
-        logger.debug(f"Converting article_id '{article_id}' to ObjectId")
-        object_id = ObjectId(article_id)
+    Returns:
+        bool: True if update successful, False otherwise
+    """
+    return _update_review_fields(
+        article_id,
+        {"summary_review_status": status, "orgnl_artcl_rv_sts": status},
+        "both review statuses"
+    )
+
+
+# Fields bulk_update_review_status is allowed to write
+REVIEW_STATUS_FIELDS = ("summary_review_status", "orgnl_artcl_rv_sts")
+
+
+def bulk_update_review_status(updates: List[Dict[str, str]]) -> int:
+    """
+    Apply several review status updates in a single bulk write.
+    
+    Items with an invalid article_id or no review status fields are skipped,
+    and keys other than the review status fields are ignored, so one bad item
+    does not stop the rest of the batch from being written.
+    
+    Args:
+        updates (List[Dict[str, str]]): Items with an "article_id" key plus the
+            status fields to set ("summary_review_status", "orgnl_artcl_rv_sts")
         
-        # Update the document
-        logger.info(f"Executing MongoDB update operation for original article review status")
-        result = collection.update_one(
-            {"_id": object_id},
-            {"$set": {"orgnl_artcl_rv_sts": status}}
-        )
+    Returns:
+        int: Number of documents modified
+    """
+    logger.info(f"Bulk updating review status for {len(updates)} articles")
+    
+    operations = []
+    for update in updates:
+        article_id = update.get("article_id")
+        if not article_id or not ObjectId.is_valid(article_id):
+            logger.warning(f"Invalid article_id '{article_id}', skipping update")
+            continue
         
-        success = result.modified_count > 0
-        logger.info(f"Update result - Modified count: {result.modified_count}, Success: {success}")
+        ignored = set(update) - set(REVIEW_STATUS_FIELDS) - {"article_id"}
+        if ignored:
+            logger.warning(f"Ignoring non review status fields {sorted(ignored)} for article {article_id}")
         
-        if success:
-            logger.info(f"Successfully updated article {article_id} original article review status to '{status}'")
-        else:
-            logger.warning(f"No documents were modified for article {article_id}")
+        fields = {k: update[k] for k in REVIEW_STATUS_FIELDS if k in update}
+        if not fields:
+            logger.warning(f"No review status fields given for article {article_id}, skipping update")
+            continue
         
-        return success
+        # Same update form as _update_review_fields: literal values, server-side reviewed_at
+        operations.append(UpdateOne(
+            {"_id": ObjectId(article_id)},
+            {"$set": fields, "$currentDate": {"reviewed_at": True}}
+        ))
+    
+    if not operations:
+        return 0
+    
+    try:
+        # Unordered so one failed write does not block the rest of the batch
+        logger.info(f"Executing MongoDB bulk_write with {len(operations)} operations")
+        result = collection.bulk_write(operations, ordered=False)
+        
+        logger.info(f"Bulk update result - Matched: {result.matched_count}, Modified: {result.modified_count}")
+        modified_count = result.modified_count
+        
+    except BulkWriteError as e:
+        # The operations that did not fail have already been applied
+        modified_count = e.details.get("nModified", 0)
+        logger.error(
+            f"Bulk update partially failed - Modified: {modified_count}, "
+            f"Errors: {len(e.details.get('writeErrors', []))}"
+        )
         
     except Exception as e:
-        logger.error(f"Error updating original article review status for article {article_id}: {e}", exc_info=True)
-        return False
\ No newline at end of file
+        logger.error(f"Error in bulk review status update: {e}", exc_info=True)
+        return 0
+    
+    if modified_count:
+        _clear_count_cache()
+    return modified_count
+
+
+def ensure_indexes() -> bool:
+    """
+    Create the indexes the app's queries rely on.
+    
+    This is a one-off admin step, not run at import, so viewer processes do
+    not send DDL or wait on the cluster at startup. Run it with:
+    python byte_extractor_service.py
+    
+    Returns:
+        bool: True if all indexes exist, False otherwise
+    """
+    logger.info("Ensuring MongoDB indexes")
+    
+    try:
+        # create_index is a no-op when an identical index already exists
+        for keys in INDEXES:
+            name = collection.create_index(keys)
+            logger.info(f"Index ensured: {name}")
+        return True
+        
+    except PyMongoError as e:
+        logger.error(f"Could not ensure MongoDB indexes: {e}", exc_info=True)
+        return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if ensure_indexes() else 1)
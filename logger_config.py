@@ -1,5 +1,8 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
 
 def setup_logger(name: str = "heartfulness_viewer", level: str = "INFO"):
@@ -48,9 +51,17 @@ def setup_logger(name: str = "heartfulness_viewer", level: str = "INFO"):
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
     
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Route records through a queue so file and console writes happen on a
+    # background thread instead of the caller's (Streamlit script) thread
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # Add queue handler to logger
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     return logger
 